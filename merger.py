@@ -1,42 +1,226 @@
 import pandas as pd
+import duckdb
+import polars as pl
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pa_pq
 import argparse
+import csv
 
-def merge_files(file1, file2, output, merge_type='inner'):
+# SQL join keywords for each pandas-style merge type
+SQL_JOIN_TYPES = {
+    "inner": "INNER",
+    "left": "LEFT",
+    "right": "RIGHT",
+    "outer": "FULL OUTER",
+}
+
+# Arrow join types for each pandas-style merge type
+ARROW_JOIN_TYPES = {
+    "inner": "inner",
+    "left": "left outer",
+    "right": "right outer",
+    "outer": "full outer",
+}
+
+# Polars join types for each pandas-style merge type
+POLARS_JOIN_TYPES = {
+    "inner": "inner",
+    "left": "left",
+    "right": "right",
+    "outer": "full",
+}
+
+def csv_header(path):
+    """Return the header row of the CSV at `path`."""
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        return next(csv.reader(f), [])
+
+def check_business_name_column(path):
+    """Raise ValueError if the CSV at `path` has no 'Business Name' column."""
+    if 'Business Name' not in csv_header(path):
+        raise ValueError(f"Column 'Business Name' not found in {path}")
+
+def merge_files_duckdb(file1, file2, output, merge_type='inner', output_format='csv'):
     """
-    Merge two CSV files based on 'Business Name' column and save the result.
-    
-    Args:
-        file1: Path to first CSV file
-        file2: Path to second CSV file
-        output: Path for the output merged CSV
-        merge_type: Type of merge ('inner', 'left', 'right', or 'outer')
+    Merge two CSV files with a DuckDB join, streaming straight to the output.
+
+    DuckDB parallelizes the scan/join/write across cores and spills to disk
+    when the inputs don't fit in memory, so no Python row objects are built.
+    """
+    check_business_name_column(file1)
+    check_business_name_column(file2)
+
+    join_type = SQL_JOIN_TYPES[merge_type]
+    if output_format == 'parquet':
+        copy_options = "(FORMAT PARQUET, COMPRESSION ZSTD)"
+    else:
+        copy_options = "(HEADER, FORMAT CSV)"
+    # duckdb.sql() returns None for COPY statements; execute() gives back the
+    # row count.
+    copied = duckdb.execute(
+        f"COPY (SELECT * FROM read_csv_auto('{file1}') f1 "
+        f'{join_type} JOIN read_csv_auto(\'{file2}\') f2 USING ("Business Name")) '
+        f"TO '{output}' {copy_options}"
+    ).fetchone()[0]
+    print(f"Merged {copied} records")
+    print(f"Merged files saved to {output}")
+
+def merge_files_polars(file1, file2, output, merge_type='inner', output_format='csv'):
+    """
+    Merge two CSV files with a lazy Polars pipeline.
+
+    scan_csv + sink_csv/sink_parquet run on Polars' streaming engine, so the
+    join never materializes either input and memory stays bounded regardless
+    of size.
+    """
+    check_business_name_column(file1)
+    check_business_name_column(file2)
+
+    merged = pl.scan_csv(file1).join(
+        pl.scan_csv(file2), on='Business Name',
+        how=POLARS_JOIN_TYPES[merge_type], coalesce=True)
+    if output_format == 'parquet':
+        merged.sink_parquet(output, compression='zstd')
+    else:
+        merged.sink_csv(output)
+    print(f"Merged files saved to {output}")
+
+def merge_files_arrow(file1, file2, output, merge_type='inner', output_format='csv'):
+    """
+    Merge two CSV files with PyArrow tables.
+
+    Arrow's CSV reader tokenizes on all cores and stores strings in columnar
+    buffers instead of Python objects; the join is a hash join in C++.
     """
-    df1 = pd.read_csv(file1)
-    df2 = pd.read_csv(file2)
-    
-    # Check if 'Business Name' column exists in both dataframes
-    if 'Business Name' not in df1.columns:
+    t1 = pa_csv.read_csv(file1)
+    t2 = pa_csv.read_csv(file2)
+
+    # Check if 'Business Name' column exists in both tables
+    if 'Business Name' not in t1.column_names:
         raise ValueError(f"Column 'Business Name' not found in {file1}")
-    if 'Business Name' not in df2.columns:
+    if 'Business Name' not in t2.column_names:
         raise ValueError(f"Column 'Business Name' not found in {file2}")
-    
+
+    merged = t1.join(t2, keys=['Business Name'], join_type=ARROW_JOIN_TYPES[merge_type])
+    if output_format == 'parquet':
+        pa_pq.write_table(merged, output, compression='zstd')
+    else:
+        pa_csv.write_csv(merged, output)
+    print(f"Merged {merged.num_rows} records from {t1.num_rows} and {t2.num_rows} input records")
+    print(f"Merged files saved to {output}")
+
+def merge_files_pandas(file1, file2, output, merge_type='inner', columns=None, chunksize=None,
+                       output_format='csv'):
+    """
+    Merge two CSV files in memory with pandas (fallback engine).
+
+    Reads use the pyarrow parser and Arrow-backed dtypes, which parse in
+    parallel and avoid one Python object per string cell. `columns` limits
+    the read to the listed columns ('Business Name' is always included).
+    With `chunksize`, file1 is streamed in chunks against file2 held in
+    memory, so file1 can be arbitrarily large.
+    """
+    check_business_name_column(file1)
+    check_business_name_column(file2)
+
+    def usecols(path):
+        # Intersect with each file's header: the requested columns need not
+        # exist in both files.
+        if not columns:
+            return None
+        wanted = set(columns) | {'Business Name'}
+        return [c for c in csv_header(path) if c in wanted]
+
+    if chunksize:
+        # The chunked path appends to the output as it goes, which only works
+        # for CSV.
+        if output_format == 'parquet':
+            raise ValueError("chunked merge only writes CSV; drop --chunksize or "
+                             "use another engine for parquet output")
+        # Unmatched right-side rows can't be tracked across chunks, so only
+        # joins driven by file1 are supported here.
+        if merge_type in ('right', 'outer'):
+            raise ValueError("chunked merge only supports 'inner' and 'left'; "
+                             "use the duckdb or polars engine for right/outer "
+                             "joins on large files")
+        small = pd.read_csv(file2, engine='pyarrow', dtype_backend='pyarrow',
+                            usecols=usecols(file2)).set_index('Business Name')
+        total = 0
+        first = True
+        # The pyarrow parser doesn't support chunksize; chunks use the C engine
+        for chunk in pd.read_csv(file1, chunksize=chunksize, usecols=usecols(file1)):
+            merged = chunk.merge(small, left_on='Business Name', right_index=True, how=merge_type)
+            merged.to_csv(output, mode='w' if first else 'a', header=first, index=False)
+            total += len(merged)
+            first = False
+        print(f"Merged {total} records")
+        print(f"Merged files saved to {output}")
+        return
+
+    df1 = pd.read_csv(file1, engine='pyarrow', dtype_backend='pyarrow', usecols=usecols(file1))
+    df2 = pd.read_csv(file2, engine='pyarrow', dtype_backend='pyarrow', usecols=usecols(file2))
+
     merged = df1.merge(df2, on='Business Name', how=merge_type)
-    merged.to_csv(output, index=False)
+    # Serialize through Arrow rather than DataFrame.to_csv: the Arrow-backed
+    # columns convert near zero-copy and the writers emit from columnar
+    # buffers in C++ instead of looping over rows in Python.
+    table = pa.Table.from_pandas(merged, preserve_index=False)
+    if output_format == 'parquet':
+        pa_pq.write_table(table, output, compression='zstd')
+    else:
+        pa_csv.write_csv(table, output)
     print(f"Merged {len(merged)} records from {len(df1)} and {len(df2)} input records")
     print(f"Merged files saved to {output}")
 
+def merge_files(file1, file2, output, merge_type='inner', engine='duckdb', columns=None,
+                chunksize=None, output_format='csv'):
+    """
+    Merge two CSV files based on 'Business Name' column and save the result.
+
+    Args:
+        file1: Path to first CSV file
+        file2: Path to second CSV file
+        output: Path for the merged output file
+        merge_type: Type of merge ('inner', 'left', 'right', or 'outer')
+        engine: Merge engine to use ('duckdb', 'polars', 'arrow', or 'pandas')
+        columns: Optional list of columns to keep (pandas engine only)
+        chunksize: Stream file1 in chunks of this many rows (pandas engine only)
+        output_format: Output file format ('csv' or 'parquet')
+    """
+    if engine == 'duckdb':
+        merge_files_duckdb(file1, file2, output, merge_type, output_format)
+    elif engine == 'polars':
+        merge_files_polars(file1, file2, output, merge_type, output_format)
+    elif engine == 'arrow':
+        merge_files_arrow(file1, file2, output, merge_type, output_format)
+    else:
+        merge_files_pandas(file1, file2, output, merge_type, columns, chunksize, output_format)
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Merge two CSV files based on Business Name column")
     parser.add_argument("file1", help="Path to the first CSV file")
     parser.add_argument("file2", help="Path to the second CSV file")
     parser.add_argument("output", help="Path for the output merged CSV file")
-    parser.add_argument("--merge-type", choices=["inner", "left", "right", "outer"], 
+    parser.add_argument("--merge-type", choices=["inner", "left", "right", "outer"],
                         default="inner", help="Type of merge to perform (default: inner)")
-    
+    parser.add_argument("--engine", choices=["duckdb", "polars", "arrow", "pandas"],
+                        default="duckdb", help="Merge engine to use (default: duckdb)")
+    parser.add_argument("--columns", nargs="+", metavar="COLUMN",
+                        help="Only read and keep these columns; 'Business Name' is "
+                             "always included (pandas engine only)")
+    parser.add_argument("--chunksize", type=int, metavar="ROWS",
+                        help="Stream file1 in chunks of this many rows against "
+                             "file2 held in memory (pandas engine only)")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv",
+                        help="Output file format (default: csv); parquet is "
+                             "zstd-compressed, typed, and much faster to re-read")
+
     args = parser.parse_args()
-     
+
     try:
-        merge_files(args.file1, args.file2, args.output, args.merge_type)
+        merge_files(args.file1, args.file2, args.output, args.merge_type, args.engine,
+                    args.columns, args.chunksize, args.format)
     except Exception as e:
         print(f"Error: {e}")
         exit(1)
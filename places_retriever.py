@@ -1,5 +1,8 @@
-import requests
+import httpx
+import asyncio
 import csv
+import diskcache
+import orjson
 import os
 from dotenv import load_dotenv
 import logging
@@ -12,66 +15,143 @@ INPUT_FILENAME = "input.csv"  # Assumes input file is in the same directory
 OUTPUT_FILENAME = "output.csv"
 BUSINESS_NAME_COLUMN = "Business Name" # Header of the column containing business names in input.csv
 PLACES_API_URL = "https://places.googleapis.com/v1/places:searchText"
-# Fields to request from the Places API (ensure these cover needed data)
+# Fields to request from the Places API (ensure these cover needed data).
+# Only the photo subfields we actually read are requested: smaller responses
+# mean fewer bytes on the wire, less JSON to parse, and a lower billing SKU.
 # See: https://developers.google.com/maps/documentation/places/web-service/search-text#fields
-FIELD_MASK = "places.rating,places.userRatingCount,places.photos"
+FIELD_MASK = ",".join([
+    "places.rating",
+    "places.userRatingCount",
+    "places.photos.name",
+    "places.photos.authorAttributions.displayName",
+    "places.photos.authorAttributions.uri",
+])
+MAX_CONCURRENCY = 32  # Cap on in-flight API calls, multiplexed as HTTP/2 streams
+MAX_CONNECTIONS = 10  # A few HTTP/2 connections carry all concurrent streams
+MAX_RETRIES = 3
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_PHOTOS = 10  # Photo columns in the output; the API returns at most 10 photos per place
+PHOTO_MAX_WIDTH = 400  # maxWidthPx for constructed photo URLs
+FLUSH_EVERY = 50  # Flush the output file every N rows so progress survives a crash
+CACHE_DIR = ".places_cache"
+CACHE_EXPIRE_SECONDS = 86400 * 7  # Place details are stable enough to reuse for a week
+
+# Constant halves of the photo URL, computed once instead of re-formatting the
+# API key and width into an f-string for every photo of every place. main()
+# verifies API_KEY is set before any URL is built.
+_PHOTO_URL_PREFIX = "https://places.googleapis.com/v1/"
+_PHOTO_URL_SUFFIX = f"/media?key={API_KEY}&maxWidthPx={PHOTO_MAX_WIDTH}"
+
+# Shared, read-only request headers, built once instead of one dict per call.
+# main() refuses to run without an API key, so no request goes out with a
+# missing key.
+_HEADERS = {
+    "Content-Type": "application/json",
+    "X-Goog-Api-Key": API_KEY,
+    "X-Goog-FieldMask": FIELD_MASK,
+}
+
+# --- Result Cache ---
+# Results persist on disk across runs, so reruns and duplicated names don't
+# re-hit the paid API. Delete the cache directory to force fresh lookups.
+_CACHE = diskcache.Cache(CACHE_DIR)
 
 # --- Logging Setup ---
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 # --- Helper Functions ---
-def get_place_details(business_name: str):
+async def _post_with_retry(client: httpx.AsyncClient, data: dict):
+    """POSTs to the Places API, retrying transient failures (429 / 5xx) with backoff."""
+    for attempt in range(MAX_RETRIES + 1):
+        response = await client.post(PLACES_API_URL, json=data, headers=_HEADERS)
+        if response.status_code in RETRY_STATUSES and attempt < MAX_RETRIES:
+            await asyncio.sleep(2 ** attempt)
+            continue
+        response.raise_for_status()
+        # orjson parses the photo-heavy payloads ~3x faster than the stdlib
+        # json used by response.json(); with network overlapped by the event
+        # loop, parsing is the remaining per-response CPU cost.
+        return orjson.loads(response.content)
+
+async def get_place_details(client: httpx.AsyncClient, business_name: str):
     """Queries the Google Places API for a given business name."""
-    if not API_KEY:
-        logging.error("GOOGLE_PLACES_API_KEY not found in environment variables.")
-        return None
     if not business_name:
         logging.warning("Skipping empty business name.")
         return None
 
-    headers = {
-        "Content-Type": "application/json",
-        "X-Goog-Api-Key": API_KEY,
-        "X-Goog-FieldMask": FIELD_MASK
-    }
+    cache_key = business_name.strip().casefold()
+    cached = _CACHE.get(cache_key)
+    if cached is not None:
+        logging.info(f"Cache hit for '{business_name}'.")
+        return cached
+
     data = {
         "textQuery": business_name
     }
 
     try:
-        response = requests.post(PLACES_API_URL, json=data, headers=headers)
-        response.raise_for_status()  # Raise an exception for bad status codes (4xx or 5xx)
-        results = response.json()
+        results = await _post_with_retry(client, data)
         # The API might return multiple places; we usually want the first/most relevant one.
         if results and "places" in results and len(results["places"]) > 0:
-            # Return the first place found
-            return results["places"][0]
+            # Return the first place found, caching it for future runs
+            place = results["places"][0]
+            _CACHE.set(cache_key, place, expire=CACHE_EXPIRE_SECONDS)
+            return place
         else:
             logging.warning(f"No place found for '{business_name}'. Response: {results}")
             return None
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPStatusError as e:
+        logging.error(f"API request failed for '{business_name}': {e}")
+        logging.error(f"Response status: {e.response.status_code}")
+        logging.error(f"Response text: {e.response.text}")
+        return None
+    except httpx.HTTPError as e:
         logging.error(f"API request failed for '{business_name}': {e}")
-        if hasattr(e, 'response') and e.response is not None:
-            logging.error(f"Response status: {e.response.status_code}")
-            logging.error(f"Response text: {e.response.text}")
         return None
     except Exception as e:
         logging.error(f"An unexpected error occurred processing '{business_name}': {e}")
         return None
 
-def construct_photo_url(photo_name: str, max_width: int = 400) -> str:
+def construct_photo_url(photo_name: str) -> str:
     """Constructs the photo URL using the photo name and API key."""
     # The photo name format is typically 'places/{place_id}/photos/{photo_reference}'
     # The API URL format is https://places.googleapis.com/v1/{photo_name}/media?key=API_KEY&maxWidthPx={max_width}
-    if not API_KEY:
-        logging.error("Cannot construct photo URL without API key.")
-        return ""
     if not photo_name:
         return ""
-    return f"https://places.googleapis.com/v1/{photo_name}/media?key={API_KEY}&maxWidthPx={max_width}"
+    return _PHOTO_URL_PREFIX + photo_name + _PHOTO_URL_SUFFIX
+
+def build_result_row(business_name: str, details) -> dict:
+    """Builds one output CSV row from a place details response (or None)."""
+    result_row = {
+        BUSINESS_NAME_COLUMN: business_name,
+        "review count": "",
+        "rating": "",
+        "image_attributions": ""
+    }
+
+    if details:
+        result_row["review count"] = str(details.get("userRatingCount", ""))
+        result_row["rating"] = str(details.get("rating", ""))
+
+        # One pass over the photos (capped at the fixed column count) yields
+        # each URL together with its combined attribution string (usually
+        # just one author per photo).
+        pairs = [
+            (construct_photo_url(p["name"]),
+             "; ".join(f"{a.get('displayName', '')}: {a.get('uri', '')}"
+                       for a in p.get("authorAttributions", ()) if a))
+            for p in details.get("photos", [])[:MAX_PHOTOS] if p.get("name")
+        ]
+        photo_urls, attributions = zip(*pairs) if pairs else ((), ())
+
+        result_row.update({f"photos_{i}": url for i, url in enumerate(photo_urls)})
+        # Compile all attributions into a single string
+        result_row["image_attributions"] = " | ".join(filter(None, attributions)) # Join non-empty attributions
+
+    return result_row
 
 # --- Main Script Logic ---
-def main():
+async def main():
     logging.info("Starting script...")
 
     if not API_KEY:
@@ -81,12 +161,15 @@ def main():
     business_names = []
     try:
         with open(INPUT_FILENAME, 'r', newline='', encoding='utf-8') as infile:
-            reader = csv.DictReader(infile)
-            if BUSINESS_NAME_COLUMN not in reader.fieldnames:
+            # csv.reader + positional index avoids DictReader's per-row dict
+            # allocation when we only want one column.
+            reader = csv.reader(infile)
+            header = next(reader, [])
+            if BUSINESS_NAME_COLUMN not in header:
                 logging.critical(f"Input file '{INPUT_FILENAME}' does not contain the column '{BUSINESS_NAME_COLUMN}'. Exiting.")
                 return
-            for row in reader:
-                business_names.append(row[BUSINESS_NAME_COLUMN].strip())
+            name_col = header.index(BUSINESS_NAME_COLUMN)
+            business_names = [row[name_col].strip() for row in reader if len(row) > name_col]
         logging.info(f"Read {len(business_names)} business names from '{INPUT_FILENAME}'.")
     except FileNotFoundError:
         logging.critical(f"Input file '{INPUT_FILENAME}' not found. Please create it in the same directory as the script. Exiting.")
@@ -95,76 +178,57 @@ def main():
         logging.critical(f"Error reading '{INPUT_FILENAME}': {e}. Exiting.")
         return
 
-    all_results = []
-    max_photos = 0 # Track the maximum number of photos found for any place
-
-    for i, name in enumerate(business_names):
-        logging.info(f"Processing {i+1}/{len(business_names)}: '{name}'")
-        details = get_place_details(name)
-        result_row = {
-            BUSINESS_NAME_COLUMN: name,
-            "review count": "",
-            "rating": "",
-            "image_attributions": ""
-        }
-
-        if details:
-            result_row["review count"] = str(details.get("userRatingCount", ""))
-            result_row["rating"] = str(details.get("rating", ""))
-
-            photos_data = details.get("photos", [])
-            photo_urls = []
-            attributions = []
-
-            if photos_data:
-                 # Limit to a reasonable number, e.g., 10, if necessary
-                current_photo_count = 0
-                for photo in photos_data:
-                    photo_name = photo.get("name")
-                    if photo_name:
-                        photo_url = construct_photo_url(photo_name)
-                        photo_urls.append(photo_url)
-                        # Add attribution for this photo if available
-                        author_attributions = photo.get("authorAttributions", [])
-                        if author_attributions:
-                           # Combine attributions for this photo (usually just one)
-                           photo_attrib_text = "; ".join([a.get('displayName', '') + ': ' + a.get('uri', '') for a in author_attributions if a])
-                           attributions.append(photo_attrib_text)
-                        current_photo_count += 1
-
-                # Update max_photos if this place has more photos than previously seen
-                if current_photo_count > max_photos:
-                    max_photos = current_photo_count
-
-                # Add photo URLs to the row
-                for idx, url in enumerate(photo_urls):
-                     result_row[f"photos_{idx}"] = url
-
-                # Compile all attributions into a single string
-                result_row["image_attributions"] = " | ".join(filter(None, attributions)) # Join non-empty attributions
-
-        all_results.append(result_row)
-
-    # --- Write Output ---
-    if not all_results:
-        logging.warning("No results to write to output file.")
-        return
-
-    # Define output headers dynamically based on max_photos
+    # Collapse names that differ only in case/whitespace to a single query,
+    # then fan each result back out to every row that asked for it. Saves API
+    # quota proportional to the duplication rate in the input.
+    name_groups = {}  # normalized key -> names as they appeared in the input
+    for name in business_names:
+        name_groups.setdefault(name.strip().casefold(), []).append(name)
+    if len(name_groups) < len(business_names):
+        logging.info(f"Collapsed {len(business_names)} rows to {len(name_groups)} unique business names.")
+
+    # Fire all queries through one HTTP/2 client; the semaphore bounds how
+    # many are in flight at once so latencies overlap without flooding the API.
+    semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+
+    async def fetch(client: httpx.AsyncClient, names: list):
+        async with semaphore:
+            return names, await get_place_details(client, names[0])
+
+    # Fixed headers let us stream each row to disk as its request completes,
+    # so memory stays flat and partial output survives a crash. Rows land in
+    # completion order, not input order.
     output_headers = [BUSINESS_NAME_COLUMN, "review count", "rating"]
-    output_headers.extend([f"photos_{i}" for i in range(max_photos)])
+    output_headers.extend([f"photos_{i}" for i in range(MAX_PHOTOS)])
     output_headers.append("image_attributions")
 
+    written = 0
     try:
         with open(OUTPUT_FILENAME, 'w', newline='', encoding='utf-8') as outfile:
             writer = csv.DictWriter(outfile, fieldnames=output_headers, extrasaction='ignore') # Ignore extra fields in dict if any
             writer.writeheader()
-            writer.writerows(all_results)
-        logging.info(f"Successfully wrote {len(all_results)} rows to '{OUTPUT_FILENAME}'.")
+
+            # HTTP/2 multiplexes the concurrent requests over a handful of
+            # connections: fewer TLS handshakes, no head-of-line blocking
+            # between keepalive requests.
+            limits = httpx.Limits(max_connections=MAX_CONNECTIONS,
+                                  max_keepalive_connections=MAX_CONNECTIONS)
+            async with httpx.AsyncClient(http2=True, limits=limits) as client:
+                tasks = [asyncio.ensure_future(fetch(client, names)) for names in name_groups.values()]
+                for future in asyncio.as_completed(tasks):
+                    names, details = await future
+                    # One output row per input row, duplicates included
+                    for name in names:
+                        writer.writerow(build_result_row(name, details))
+                        written += 1
+                    logging.info(f"Processed {written}/{len(business_names)}: '{names[0]}'")
+                    if written % FLUSH_EVERY == 0:
+                        outfile.flush()
+        logging.info(f"Successfully wrote {written} rows to '{OUTPUT_FILENAME}'.")
     except Exception as e:
         logging.error(f"Error writing to '{OUTPUT_FILENAME}': {e}")
 
     logging.info("Script finished.")
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())